@@ -1,10 +1,13 @@
 #!/usr/bin/python3.8
 
-from enum import Enum
+from enum import Enum, IntEnum
 import socket
+import sys
 import time
-import copy
-import select
+import selectors
+import bisect
+import struct
+import array
 
 def GetBits(val, lsb_pos, n_bits = 1):
     return (val >> lsb_pos) & ((1 << n_bits) - 1)
@@ -18,13 +21,23 @@ def DumpByte(buf, pos, label = "buf"):
 def ToBit(val, bit):
     return val << bit
 
+# Frame checksum: the sum of everything between the 7e 7e preamble and the checksum byte itself.
+# Summing over a memoryview slice runs the loop in C without copying the buffer. Used both to
+# stamp outgoing frames and to check received ones.
+def Checksum(buf):
+    return sum(memoryview(buf)[2:-1]) & 0xff
+
+# Hex-dump every frame received, and the config we would send back. Frames that fail to parse
+# are dumped regardless.
+DUMP_FRAMES = False
+
 def DumpBuffer(label, buf, verbose = False):
     if not buf:
         print(f"{label} = None")
         return
     
     if not verbose:
-        print(label + " = " + " ".join([f"{v:02x}" for v in buf]) + "")
+        print(f"{label} = {bytes(buf).hex(' ')}")
         return
     
     for i in range(0, len(buf)):
@@ -34,6 +47,10 @@ def DumpBuffer(label, buf, verbose = False):
 class DeviceSocket:
     def __init__(self):
         self.socket = None
+        self.selector = None
+
+        # Receive buffer, reused for every incoming frame. Frames are at most 3 + 60 bytes.
+        self.rx_buf = bytearray(64)
     
     def Open(self):
         if self.socket:
@@ -41,107 +58,156 @@ class DeviceSocket:
             return False
 
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        return self.socket.connect(('192.168.0.1', 6000))
+
+        # Everything we send is a small, latency-sensitive control frame. Don't let Nagle hold
+        # them back waiting for an ACK.
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        try:
+            self.socket.connect(('192.168.0.1', 6000))
+        except OSError as e:
+            print(f"Could not connect to device: {e}")
+            self.socket.close()
+            self.socket = None
+            return False
+
+        # Register the socket once with a persistent selector (epoll/kqueue where available), so
+        # Available() doesn't have to build a new fd set on every poll
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.socket, selectors.EVENT_READ)
+
+        return True
 
     def Close(self):
         if not self.socket:
             return False
 
+        self.selector.close()
+        self.selector = None
+
         self.socket.close()
+        self.socket = None
 
         return True
 
-    def SendRaw(self, buf):
-        if not buf:
+    # Send one or more frames back-to-back using a single send call, rather than one per frame.
+    # None entries are skipped.
+    def SendRaw(self, *bufs):
+        bufs = [buf for buf in bufs if buf is not None]
+        if not bufs:
             return False
 
-        return self.socket.send(buf)
+        self.socket.sendall(b"".join(bufs))
+        return True
     
     def SendConfig(self, cfg):
-        if not cfg:
+        if cfg is None:
             return False
 
         encoded = cfg.Encode()
 
-        if not encoded:
+        if encoded is None:
             return False
 
-        return self.SendRaw(bytes(encoded))
+        return self.SendRaw(encoded)
+
+    # Send several configs back-to-back using a single send call, rather than one per config
+    def SendMany(self, cfgs):
+        return self.SendRaw(*[cfg.Encode() for cfg in cfgs if cfg is not None])
 
 
     def SendQuery(self):
+        return self.SendRaw(DeviceSocket.QueryFrame())
+
+
+    @staticmethod
+    def QueryFrame():
         buf = bytearray(5)
         buf[0] = 0x7e
         buf[1] = 0x7e
         buf[2] = 0x02
         buf[3] = 0x02
-        DeviceSocket.SetChecksum(buf)
-        self.SendRaw(buf)
+        buf[-1] = Checksum(buf)
+        return buf
 
 
     @staticmethod
     def CalcChecksum(buf):
         length = len(buf)
-        cs = 0
         if length < 4:
             print(f"Buffer length too short for a checksum? {length}")
             return None
 
-        for i in range(2, length - 1):
-            cs += buf[i]
-
-        return cs & 0xff
-
-
-    @staticmethod
-    def SetChecksum(buf):
-        buf[len(buf) - 1] = DeviceSocket.CalcChecksum(buf)
+        return Checksum(buf)
 
 
     def Read(self):
-        header = self.socket.recv(3)
-        
-        if header[0] != 0x7e or header[1] != 0x7e or header[2] > 60:
+        rx = memoryview(self.rx_buf)
+
+        # MSG_WAITALL so that a frame split across TCP segments is not mistaken for a short one
+        n = self.socket.recv_into(rx[:3], 3, socket.MSG_WAITALL)
+        if n == 0:
+            # The device closed the connection. The socket would stay readable forever, so don't
+            # leave it to the caller to keep polling it.
+            self.Close()
+            raise ConnectionError("Device closed the connection")
+
+        if n < 3:
+            print(f"Short read on header? {n}")
+            return None
+
+        if rx[0] != 0x7e or rx[1] != 0x7e or rx[2] > 60:
             print(f"Invald header?")
-            DumpBuffer("header", header)
+            DumpBuffer("header", rx[:3])
             return None
 
-        remaining_length = header[2]
+        packet_length = 3 + rx[2]
 
-        body = self.socket.recv(remaining_length)
+        n = self.socket.recv_into(rx[3:packet_length], packet_length - 3, socket.MSG_WAITALL)
+        if n < packet_length - 3:
+            print(f"Short read on body? {n}")
+            return None
 
-        packet = header + body
+        packet = rx[:packet_length]
 
         expected_cs = DeviceSocket.CalcChecksum(packet)
-        packet_cs = packet[len(packet) - 1]
+        packet_cs = packet[-1]
         if packet_cs != expected_cs:
             print(f"Bad checksum in device message? Saw {packet_cs:02x}, expected {expected_cs :02x}")
             DumpBuffer("packet", packet)
             return None
 
-        return packet
+        # Hand back a copy, since rx_buf gets overwritten by the next Read()
+        return bytes(packet)
 
     def Available(self, timeout = 0):
-        if not self.socket:
+        if not self.selector:
             return False
 
-        # Use select to check if there's data to read
-        readable, _, _ = select.select([self.socket], [], [], timeout)
-        return len(readable) > 0
+        return len(self.selector.select(timeout)) > 0
 
-class TempUnits(Enum):
+# The protocol enums are IntEnums so their members can be shifted straight into the encoded
+# frame without going through .value. They still print as EnumName.MEMBER, like a plain Enum.
+class DeviceEnum(IntEnum):
+    def __str__(self):
+        return Enum.__str__(self)
+
+    def __format__(self, format_spec):
+        return format(str(self), format_spec)
+
+class TempUnits(DeviceEnum):
     UNKNOWN = -1
     CELSIUS = 0
     FAHRENHEIT = 1
 
-class TempDisplay(Enum):
+class TempDisplay(DeviceEnum):
     UNKNOWN = -1
     NONE = 0
     SETPOINT = 1
     INDOOR = 2
     OUTDOOR = 3
 
-class DeviceMode(Enum):
+class DeviceMode(DeviceEnum):
     UNKNOWN = -1
     AUTO = 0
     COOL = 1    # 16
@@ -152,7 +218,7 @@ class DeviceMode(Enum):
     MODE6 = 6
     MODE7 = 7
 
-class FanState(Enum):
+class FanState(DeviceEnum):
     UNKNOWN = -1
     AUTO = 0
     LEVEL_1 = 1
@@ -165,14 +231,14 @@ class FanState(Enum):
     AUTO_QUIET = 8
     UNKNOWN_QUIET = 9
 
-class ValveState(Enum):
+class ValveState(DeviceEnum):
     UNKNOWN = -1
     NONE = 0
     INTAKE = 1
     EXHAUST = 2
     OTHER = 3
 
-class HumidifyType(Enum):
+class HumidifyType(DeviceEnum):
     UNKNOWN = -1
     NONE = 0
     CONTINUOUS = 1
@@ -182,7 +248,7 @@ class HumidifyType(Enum):
     LEVEL_60 = 5
     LEVEL_70 = 6
 
-class SleepCurveType(Enum):
+class SleepCurveType(DeviceEnum):
     UNKNOWN = -1
     NONE = 0
     EXPERT = 1
@@ -190,7 +256,7 @@ class SleepCurveType(Enum):
     DIY = 3
     SIESTA = 128
 
-class HorizontalAirDirection(Enum):
+class HorizontalAirDirection(DeviceEnum):
     UNKNOWN = 0
     SWINGING = 1
     LEFT = 2
@@ -199,7 +265,7 @@ class HorizontalAirDirection(Enum):
     CENTER_RIGHT = 5
     RIGHT = 6
 
-class VerticalAirDirection(Enum):
+class VerticalAirDirection(DeviceEnum):
     UNKNOWN = 0
     SWINGING = 1
     UP = 2
@@ -208,7 +274,103 @@ class VerticalAirDirection(Enum):
     CENTER_DOWN = 5
     DOWN = 6
 
+# Decoding a status message maps a handful of small bit fields onto the enums above. Rather than
+# going through EnumClass(value) for each field on every packet (and blowing up on values we
+# have not seen before), precompute a table covering every value the field can hold.
+# Unrecognized values are kept as the plain int the unit reported, not mapped to UNKNOWN, so that
+# Encode() sends the same setting back instead of a different one (or a -1 that won't fit a byte).
+def EnumTable(enum_type, n_bits):
+    by_value = {member.value: member for member in enum_type}
+    return tuple(by_value.get(i, i) for i in range(1 << n_bits))
+
+DEVICE_MODE_TABLE = EnumTable(DeviceMode, 3)
+VALVE_STATE_TABLE = EnumTable(ValveState, 2)
+TEMP_DISPLAY_TABLE = EnumTable(TempDisplay, 2)
+HUMIDIFY_TYPE_TABLE = EnumTable(HumidifyType, 3)
+SLEEP_CURVE_TYPE_TABLE = EnumTable(SleepCurveType, 2)
+HORIZONTAL_AIR_DIRECTION_TABLE = EnumTable(HorizontalAirDirection, 4)
+VERTICAL_AIR_DIRECTION_TABLE = EnumTable(VerticalAirDirection, 4)
+
+# Plain (non-turbo, non-quiet) fan speed levels, indexed by the 3-bit fan speed field
+FAN_SPEED_TO_STATE = (
+    FanState.AUTO,
+    FanState.LEVEL_1,
+    FanState.LEVEL_2,
+    FanState.LEVEL_3,
+    FanState.LEVEL_4,
+    FanState.LEVEL_5,
+    FanState.UNKNOWN,
+    FanState.UNKNOWN,
+)
+
+# (turbo, quiet_type, fan_speed) to command for each top-level fan state. Anything not listed here
+# is commanded as plain auto (False, 0, 0).
+# In the mobile app, "Quiet" sets quiet_type to 2 and "Auto quiet" sets it to 1. "Quiet" on the RF
+# remote seems to set quiet_type to 2, and the app seems to prefer it too.
+# Annoyingly, quiet_type is not the same as noise control. The latter seems to be just a naive
+# mechanism for limiting the commanded fan speed, and doesn't affect the quiet_type setting?
+FAN_STATE_SETTINGS = {
+    FanState.AUTO:          (False, 0, 0),
+    FanState.LEVEL_1:       (False, 0, 1),
+    FanState.LEVEL_2:       (False, 0, 2),
+    FanState.LEVEL_3:       (False, 0, 3),
+    FanState.LEVEL_4:       (False, 0, 4),
+    FanState.LEVEL_5:       (False, 0, 5),
+    FanState.TURBO:         (True, 0, 0),
+    FanState.AUTO_QUIET:    (False, 1, 0),
+    FanState.QUIET:         (False, 2, 0),
+}
+
+# Noise levels (in dB) at which the mobile app allows the next fan speed level up. Anything below
+# the first threshold gets fan speed 0 (auto), anything at or above the last gets speed 5.
+NOISE_LEVEL_THRESHOLDS = (29, 31, 33, 36, 38)
+
+# Encoded set point for a Fahrenheit temperature: converted to C, then clamped to the same
+# 0-14 range as the Celsius encoding
+def EncodeFahrenheitTemp(temp):
+    temp_c = (temp - 32) / 9 * 5
+
+    val = int(temp_c - 15.5)
+
+    val = max(val, 0)
+    val = min(val, 14)
+
+    return val
+
+# Encoded set point for each whole-degree Fahrenheit temperature the unit supports (61-86 F),
+# precomputed so Encode() skips the float conversion
+FAHRENHEIT_TEMP_CODES = {f: EncodeFahrenheitTemp(f) for f in range(61, 87)}
+
+# The clocks and on/off times are big-endian 16-bit words, with flags packed into the top bits
+UINT16_BE = struct.Struct('>H')
+
+# Config frames are fixed-size. The header is the 7e 7e preamble, the number of bytes following
+# the length byte, and the frame type. Outgoing frames start out as a copy of the template.
+CONFIG_FRAME_LENGTH = 40
+CONFIG_FRAME_HEADER = bytes((0x7E, 0x7E, CONFIG_FRAME_LENGTH - 3, 0x01))
+CONFIG_FRAME_TEMPLATE = CONFIG_FRAME_HEADER + bytes(CONFIG_FRAME_LENGTH - len(CONFIG_FRAME_HEADER))
+
 class DeviceConfig:
+    # Fixed attribute layout; see __init__ for what each of these means
+    __slots__ = (
+        'valid', 'temp', 'temp_units', 'is_on', 'mode', 'light', 'purify', 'temp_display',
+        'eco_mode', 'fan_state', 'fan_speed', 'turbo', 'quiet_type', 'x_fan', 'x_fan_for_heat',
+        'intake_exhaust', 'fan_speed_low_res', 'mode_mystery_bit_3', 'mode_mystery_bit_2',
+        'timer_on_off_enable', 'timer_on_enable', 'timer_off_enable', 'minutes_until_on',
+        'minutes_until_off', 'clock', 'day_of_week', 'sleep_curve_clock',
+        'sleep_curve_clock_invalid', 'on_time', 'off_time', 'day_of_week_on_mask',
+        'day_of_week_off_mask', 'timer_on_use_clock', 'timer_off_use_clock',
+        'horizontal_air_direction', 'vertical_air_direction', 'humidify_type', 'heat_assist',
+        'sleep_curve_type', 'custom_sleep_curve', 'noise_control_enable',
+        'noise_control_heating', 'noise_control_cooling', 'regional_swing_position',
+        'regional_swing_avoid_people', 'use_remote_temp_sensor', 'remote_temp_val',
+        'timer_remote_flag',
+    )
+
+    # Fahrenheit set points that need the extra fractional bit when encoded, packed into a
+    # bitmap: bit N is set if N degrees F needs it.
+    FAHRENHEIT_FRACTIONAL_BITS = sum(1 << t for t in (63, 65, 67, 70, 72, 74, 76, 79, 81, 83, 85))
+
     def __init__(self):
 
         # Whether this config/status structure is valid
@@ -381,8 +543,9 @@ class DeviceConfig:
         self.sleep_curve_type = SleepCurveType.NONE
 
         # Temperatures used for the custom sleep curve. These have less precision than regular
-        # temp control (maybe within one degree C / two degrees F)
-        self.custom_sleep_curve = [0] * 8
+        # temp control (maybe within one degree C / two degrees F), so whole degrees in a byte
+        # array are plenty.
+        self.custom_sleep_curve = array.array('B', bytes(8))
 
         # Noise control. This too seems silly. The mobile app has a "noise control" feature, which
         # allows setting a max fan noise level (in dB), separately for heating and cooling mode.
@@ -429,22 +592,30 @@ class DeviceConfig:
         return min(int(temp_f), 86)
 
     def EncodeTemp(self, temp):
-        if self.temp_units == TempUnits.CELSIUS:
-            return int(temp) - 16
+        return DeviceConfig.EncodeTempForUnits(temp, self.temp_units == TempUnits.CELSIUS)
 
-        temp_c = (temp - 32) / 9 * 5
-
-        val = int(temp_c - 15.5)
+    # Same as EncodeTemp(), with the units check done by the caller. Encode() converts nine
+    # temperatures per frame and only needs to check the units once.
+    @staticmethod
+    def EncodeTempForUnits(temp, is_celsius):
+        if is_celsius:
+            return int(temp) - 16
 
-        val = max(val, 0)
-        val = min(val, 14)
+        code = FAHRENHEIT_TEMP_CODES.get(temp)
+        if code is not None:
+            return code
 
-        return val
+        # Fractional or out-of-range temperature
+        return EncodeFahrenheitTemp(temp)
 
     def EncodeTempFahrenheitFractionalBit(self, temp, units):
         if units == TempUnits.CELSIUS:
             return 0
-        return temp in [63, 65, 67, 70, 72, 74, 76, 79, 81, 83, 85]
+        # Only whole-degree set points are in the table; don't let int() round a fractional one
+        # onto a table entry
+        if temp < 0 or temp > 127 or temp != int(temp):
+            return 0
+        return (DeviceConfig.FAHRENHEIT_FRACTIONAL_BITS >> int(temp)) & 1
 
     def EncodeTempCelciusFractionalBit(self, temp, units):
         if units == TempUnits.CELSIUS:
@@ -453,18 +624,18 @@ class DeviceConfig:
 
     def DecodeFanState(self, buf):
         if self.mode == DeviceMode.COOL or self.mode == DeviceMode.DRY:
-            self.x_fan = GetBit(buf[10], 3)
+            self.x_fan = (buf[10] & 0x08) != 0
             self.x_fan_for_heat = False
 
         if self.mode == DeviceMode.HEAT:
             self.x_fan  = 0
-            self.x_fan_for_heat = GetBit(buf[10], 3)
+            self.x_fan_for_heat = (buf[10] & 0x08) != 0
 
-        self.turbo = GetBit(buf[10], 0)
-        self.quiet_type = GetBits(buf[20], 2, 2)
-        self.intake_exhaust = ValveState(GetBits(buf[11], 4, 2))
+        self.turbo = (buf[10] & 0x01) != 0
+        self.quiet_type = (buf[20] >> 2) & 0x03
+        self.intake_exhaust = VALVE_STATE_TABLE[(buf[11] >> 4) & 0x03]
 
-        self.fan_speed = GetBits(buf[22], 0, 3)
+        self.fan_speed = buf[22] & 0x07
 
         if self.turbo:
             self.fan_state = FanState.TURBO
@@ -475,80 +646,77 @@ class DeviceConfig:
         elif self.quiet_type == 3:
             print(f"Unknown quiet_type: {self.quiet_type}")
         else:
-            fan_speeds = [
-                FanState.AUTO,
-                FanState.LEVEL_1,
-                FanState.LEVEL_2,
-                FanState.LEVEL_3,
-                FanState.LEVEL_4,
-                FanState.LEVEL_5,
-            ]
-            if self.fan_speed >= 0 and self.fan_speed <= 5:
-                self.fan_state = fan_speeds[self.fan_speed]
-            else:
-                self.fan_state = FanState.UNKNOWN
+            self.fan_state = FAN_SPEED_TO_STATE[self.fan_speed]
 
     def DecodeCustomSleepCurve(self, buf):
-        self.custom_sleep_curve = [0] * 8
-        self.custom_sleep_curve[0] = self.DecodeTemp(buf[21] >> 4, 0)
-        self.custom_sleep_curve[1] = self.DecodeTemp(buf[21] & 0x0f, 0)
-        self.custom_sleep_curve[2] = self.DecodeTemp(buf[24] >> 4, 0)
-        self.custom_sleep_curve[3] = self.DecodeTemp(buf[24] & 0x0f, 0)
-        self.custom_sleep_curve[4] = self.DecodeTemp(buf[25] >> 4, 0)
-        self.custom_sleep_curve[5] = self.DecodeTemp(buf[25] & 0x0f, 0)
-        self.custom_sleep_curve[6] = self.DecodeTemp(buf[26] >> 4, 0)
-        self.custom_sleep_curve[7] = self.DecodeTemp(buf[26] & 0x0f, 0)
+        # Look up the bound method once, rather than once per curve point
+        decode_temp = self.DecodeTemp
+        self.custom_sleep_curve = array.array('B', (
+            decode_temp(buf[21] >> 4, 0),
+            decode_temp(buf[21] & 0x0f, 0),
+            decode_temp(buf[24] >> 4, 0),
+            decode_temp(buf[24] & 0x0f, 0),
+            decode_temp(buf[25] >> 4, 0),
+            decode_temp(buf[25] & 0x0f, 0),
+            decode_temp(buf[26] >> 4, 0),
+            decode_temp(buf[26] & 0x0f, 0),
+        ))
 
     def Decode(self, buf):
         if len(buf) < 51:
             print(f"Bad buffer length? {len(buf)}")
             return False
 
-        self.is_on = GetBit(buf[8], 7)
-        self.mode = DeviceMode(GetBits(buf[8], 4, 3))
+        # Bytes that several fields are unpacked from
+        b8, b9 = buf[8], buf[9]
+        b11, b12, b13, b14 = buf[11], buf[12], buf[13], buf[14]
+        b17, b39 = buf[17], buf[39]
 
-        self.mode_mystery_bit_3 = GetBit(buf[8], 3)
-        self.mode_mystery_bit_2 = GetBit(buf[8], 2)
-        self.fan_speed_low_res = GetBits(buf[8], 0, 2)
-        self.timer_on_off_enable = GetBit(buf[9], 3)
+        self.is_on = (b8 & 0x80) != 0
+        self.mode = DEVICE_MODE_TABLE[(b8 >> 4) & 0x07]
 
-        temp_upper = GetBits(buf[9], 4, 4)
-        temp_lower = GetBits(buf[11], 6, 1)
-        if GetBits(buf[11], 7):
+        self.mode_mystery_bit_3 = (b8 & 0x08) != 0
+        self.mode_mystery_bit_2 = (b8 & 0x04) != 0
+        self.fan_speed_low_res = b8 & 0x03
+        self.timer_on_off_enable = (b9 & 0x08) != 0
+
+        temp_upper = b9 >> 4
+        temp_lower = (b11 >> 6) & 0x01
+        if b11 & 0x80:
             self.temp_units = TempUnits.FAHRENHEIT
         else:
             self.temp_units = TempUnits.CELSIUS
 
         self.temp = self.DecodeTemp(temp_upper, temp_lower)
 
-        if self.temp_units == TempUnits.CELSIUS and GetBit(buf[14], 3):
+        if self.temp_units == TempUnits.CELSIUS and b14 & 0x08:
             self.temp += 0.5
 
         self.DecodeFanState(buf)
 
-        self.purify = GetBit(buf[10], 2)
-        self.light = GetBit(buf[10], 1)
+        self.purify = (buf[10] & 0x04) != 0
+        self.light = (buf[10] & 0x02) != 0
 
-        self.vertical_air_direction = VerticalAirDirection(GetBits(buf[12], 4, 4))
-        self.horizontal_air_direction = HorizontalAirDirection(GetBits(buf[12], 0, 4))
+        self.vertical_air_direction = VERTICAL_AIR_DIRECTION_TABLE[b12 >> 4]
+        self.horizontal_air_direction = HORIZONTAL_AIR_DIRECTION_TABLE[b12 & 0x0f]
 
-        self.temp_display = TempDisplay(GetBits(buf[13], 4, 2))
-        self.use_remote_temp_sensor = GetBit(buf[13], 6)
+        self.temp_display = TEMP_DISPLAY_TABLE[(b13 >> 4) & 0x03]
+        self.use_remote_temp_sensor = (b13 & 0x40) != 0
 
-        self.humidify_type = HumidifyType(GetBits(buf[14], 4, 3))
-        self.heat_assist = GetBit(buf[15], 7)
+        self.humidify_type = HUMIDIFY_TYPE_TABLE[(b14 >> 4) & 0x07]
+        self.heat_assist = (buf[15] & 0x80) != 0
 
-        self.minutes_until_on = ((buf[17] & 0x70) << 4) | buf[16]
-        self.minutes_until_off = ((buf[18] & 0x7F) << 4) | (buf[17] & 0x0F)
+        self.minutes_until_on = ((b17 & 0x70) << 4) | buf[16]
+        self.minutes_until_off = ((buf[18] & 0x7F) << 4) | (b17 & 0x0F)
 
-        self.timer_remote_flag = GetBit(buf[17], 7)
-        self.timer_on_enable = GetBit(buf[19], 5)
-        self.timer_off_enable = GetBit(buf[19], 4)
+        self.timer_remote_flag = (b17 & 0x80) != 0
+        self.timer_on_enable = (buf[19] & 0x20) != 0
+        self.timer_off_enable = (buf[19] & 0x10) != 0
 
-        if GetBit(buf[20], 7):
+        if buf[20] & 0x80:
             self.sleep_curve_type = SleepCurveType.SIESTA
         else:
-            self.sleep_curve_type = SleepCurveType(((buf[8] & 0x08) >> 2) | ((buf[20] & 0x10) >> 4))
+            self.sleep_curve_type = SLEEP_CURVE_TYPE_TABLE[((b8 & 0x08) >> 2) | ((buf[20] & 0x10) >> 4)]
 
         self.DecodeCustomSleepCurve(buf)
 
@@ -558,38 +726,38 @@ class DeviceConfig:
         # buf[27] appears to be similarly unused/unset by the mobile app. Maybe this is a
         # remote humidity measurement??
 
-        self.clock = ((buf[29] & 0x7f) << 8) | buf[30]
+        self.clock = UINT16_BE.unpack_from(buf, 29)[0] & 0x7fff
 
         # Who knows?
-        self.sleep_curve_clock_invalid = GetBit(buf[31], 7)
-        self.sleep_curve_clock = ((buf[31] & 0x7f) << 8) | buf[32]
+        self.sleep_curve_clock_invalid = (buf[31] & 0x80) != 0
+        self.sleep_curve_clock = UINT16_BE.unpack_from(buf, 31)[0] & 0x7fff
 
-        self.timer_on_use_clock = GetBits(buf[33], 6, 2)
-        self.timer_off_use_clock = GetBits(buf[33], 4, 2)
+        self.timer_on_use_clock = buf[33] >> 6
+        self.timer_off_use_clock = (buf[33] >> 4) & 0x03
 
-        self.off_time = ((buf[33] & 7) << 8) | buf[34]
-        self.on_time = ((buf[35] & 7) << 8) | buf[36]
+        self.off_time = UINT16_BE.unpack_from(buf, 33)[0] & 0x07ff
+        self.on_time = UINT16_BE.unpack_from(buf, 35)[0] & 0x07ff
 
-        self.day_of_week = GetBits(buf[35], 5, 3)
+        self.day_of_week = buf[35] >> 5
 
         # Bits 7-1; bit 0 is always 0?
         self.day_of_week_on_mask = buf[37]
         self.day_of_week_off_mask = buf[38]
 
-        self.regional_swing_avoid_people = GetBit(buf[39], 2)
+        self.regional_swing_avoid_people = (b39 & 0x04) != 0
 
-        if GetBit(buf[39], 1):
+        if b39 & 0x02:
             self.regional_swing_position = 256
         else:
             self.regional_swing_position = buf[40]
 
         # Byte 41 is unused?
 
-        self.noise_control_enable = GetBit(buf[42], 0)
+        self.noise_control_enable = (buf[42] & 0x01) != 0
 
         self.noise_control_cooling = buf[47]
         self.noise_control_heating = buf[48]
-        self.eco_mode = GetBit(buf[49], 0)
+        self.eco_mode = (buf[49] & 0x01) != 0
 
         self.valid = True
 
@@ -599,95 +767,102 @@ class DeviceConfig:
         def format_time(t):
             return f"{int(t / 60):02}:{t % 60 :02}"
 
-        print("\nGeneral:")
+        # Collect everything and print it in one go, rather than one write per line
+        lines = ["\nGeneral:"]
 
         if not self.valid:
-            print("Uninitialized device config")
+            lines.append("Uninitialized device config")
+            print("\n".join(lines))
             return
 
-        print(f"\tOn            :\t{self.is_on}")
-        print(f"\tMode          :\t{self.mode}")
-        print(f"\tTemp          :\t{self.temp}")
-        print(f"\tUnits         :\t{self.temp_units}")
-        print(f"\tTemp display  :\t{self.temp_display}")
-        print(f"\tRemote sensor :\t{self.use_remote_temp_sensor} ({self.remote_temp_val} C)")
-        print(f"\tLight         :\t{self.light}")
-        print(f"\tPurify        :\t{self.purify}")
-        print(f"\tHumidify      :\t{self.humidify_type}")
-        print(f"\tHeat Assist   :\t{self.heat_assist}")
-        print(f"\tEco mode:     :\t{self.eco_mode}")
-        print(f"\tSleep curve   :\t{self.sleep_curve_type} {self.custom_sleep_curve}")
-        print(f"\tH Direction   :\t{self.horizontal_air_direction}")
-        print(f"\tV Direction   :\t{self.vertical_air_direction}")
-
-        print("\nFan:")
-        print(f"\tState :\t{self.fan_state}")
-        print(f"\tSpeed :\t{self.fan_speed}")
-        print(f"\tLowRes:\t{self.fan_speed_low_res}")
-        print(f"\tTurbo :\t{self.turbo}")
-        print(f"\tQuiet :\t{self.quiet_type}")
-        print(f"\tValve :\t{self.intake_exhaust}")
-        print(f"\tX-fan :\t{self.x_fan}")
-        print(f"\tX-fan (Heat):\t{self.x_fan_for_heat}")
-
-        print("\nTimers:")
-        print(f"\tOn/off enabled             : {self.timer_on_off_enable}")
-        print(f"\tOn enabled                 : {self.timer_on_enable}")
-        print(f"\tOff enabled                : {self.timer_off_enable}")
-        print(f"\tRemote flag                : {self.timer_remote_flag}")
-        print(f"\tMinutes to on              : {self.minutes_until_on}")
-        print(f"\tMinutes to off             : {self.minutes_until_off}")
-        print(f"\tClock?                     : {self.clock:<4}\t{format_time(self.clock)}")
-        print(f"\tDay of week                : {self.day_of_week}")
-        print(f"\tOn time                    : {self.on_time:<4}\t{format_time(self.on_time)}")
-        print(f"\tOff time                   : {self.off_time:<4}\t{format_time(self.off_time)}")
-        print(f"\tSleep curve clock?         : {self.sleep_curve_clock:<4}\t{format_time(self.sleep_curve_clock)}")
-        print(f"\tSleep curve clock valid?   : {self.sleep_curve_clock_invalid}")
-        print(f"\tWeek day on mask           : 0x{self.day_of_week_on_mask:02x}")
-        print(f"\tWeek day off mask          : 0x{self.day_of_week_off_mask:02x}")
-        print(f"\tUse on time for schedule?  : {self.timer_on_use_clock}")
-        print(f"\tUse off time for schedule? : {self.timer_off_use_clock}")
-
-        print("\nNoise control:")
-        print(f"\tEnabled   : {self.noise_control_enable}")
-        print(f"\tIn heating : {self.noise_control_heating}")
-        print(f"\tIn cooling : {self.noise_control_cooling}")
-
-        print("\nRegional swing:")
-        print(f"\tPersion position : {self.regional_swing_position}")
-        print(f"\tAvoid people     : {self.regional_swing_avoid_people}")
+        lines.append(f"\tOn            :\t{self.is_on}")
+        lines.append(f"\tMode          :\t{self.mode}")
+        lines.append(f"\tTemp          :\t{self.temp}")
+        lines.append(f"\tUnits         :\t{self.temp_units}")
+        lines.append(f"\tTemp display  :\t{self.temp_display}")
+        lines.append(f"\tRemote sensor :\t{self.use_remote_temp_sensor} ({self.remote_temp_val} C)")
+        lines.append(f"\tLight         :\t{self.light}")
+        lines.append(f"\tPurify        :\t{self.purify}")
+        lines.append(f"\tHumidify      :\t{self.humidify_type}")
+        lines.append(f"\tHeat Assist   :\t{self.heat_assist}")
+        lines.append(f"\tEco mode:     :\t{self.eco_mode}")
+        lines.append(f"\tSleep curve   :\t{self.sleep_curve_type} {list(self.custom_sleep_curve)}")
+        lines.append(f"\tH Direction   :\t{self.horizontal_air_direction}")
+        lines.append(f"\tV Direction   :\t{self.vertical_air_direction}")
+
+        lines.append("\nFan:")
+        lines.append(f"\tState :\t{self.fan_state}")
+        lines.append(f"\tSpeed :\t{self.fan_speed}")
+        lines.append(f"\tLowRes:\t{self.fan_speed_low_res}")
+        lines.append(f"\tTurbo :\t{self.turbo}")
+        lines.append(f"\tQuiet :\t{self.quiet_type}")
+        lines.append(f"\tValve :\t{self.intake_exhaust}")
+        lines.append(f"\tX-fan :\t{self.x_fan}")
+        lines.append(f"\tX-fan (Heat):\t{self.x_fan_for_heat}")
+
+        lines.append("\nTimers:")
+        lines.append(f"\tOn/off enabled             : {self.timer_on_off_enable}")
+        lines.append(f"\tOn enabled                 : {self.timer_on_enable}")
+        lines.append(f"\tOff enabled                : {self.timer_off_enable}")
+        lines.append(f"\tRemote flag                : {self.timer_remote_flag}")
+        lines.append(f"\tMinutes to on              : {self.minutes_until_on}")
+        lines.append(f"\tMinutes to off             : {self.minutes_until_off}")
+        lines.append(f"\tClock?                     : {self.clock:<4}\t{format_time(self.clock)}")
+        lines.append(f"\tDay of week                : {self.day_of_week}")
+        lines.append(f"\tOn time                    : {self.on_time:<4}\t{format_time(self.on_time)}")
+        lines.append(f"\tOff time                   : {self.off_time:<4}\t{format_time(self.off_time)}")
+        lines.append(f"\tSleep curve clock?         : {self.sleep_curve_clock:<4}\t{format_time(self.sleep_curve_clock)}")
+        lines.append(f"\tSleep curve clock valid?   : {self.sleep_curve_clock_invalid}")
+        lines.append(f"\tWeek day on mask           : 0x{self.day_of_week_on_mask:02x}")
+        lines.append(f"\tWeek day off mask          : 0x{self.day_of_week_off_mask:02x}")
+        lines.append(f"\tUse on time for schedule?  : {self.timer_on_use_clock}")
+        lines.append(f"\tUse off time for schedule? : {self.timer_off_use_clock}")
+
+        lines.append("\nNoise control:")
+        lines.append(f"\tEnabled   : {self.noise_control_enable}")
+        lines.append(f"\tIn heating : {self.noise_control_heating}")
+        lines.append(f"\tIn cooling : {self.noise_control_cooling}")
+
+        lines.append("\nRegional swing:")
+        lines.append(f"\tPersion position : {self.regional_swing_position}")
+        lines.append(f"\tAvoid people     : {self.regional_swing_avoid_people}")
+
+        print("\n".join(lines))
 
     def Copy(self):
-        return copy.deepcopy(self)
-
-    def FanSpeedForNoiseLevel(self, noise_level):
-        if noise_level >= 38:
-            return 5
-        
-        if noise_level >= 36:
-            return 4
-        
-        if noise_level >= 33:
-            return 3
-        
-        if noise_level >= 31:
-            return 2
-        
-        if noise_level >= 29:
-            return 1
+        # Everything in here is a plain value or an enum member, which can be shared safely
+        # between copies. The only mutable member is the custom sleep curve array.
+        new = DeviceConfig.__new__(DeviceConfig)
+        for name in DeviceConfig.__slots__:
+            setattr(new, name, getattr(self, name))
+        new.custom_sleep_curve = self.custom_sleep_curve[:]
+        return new
 
-        return 0
+    @staticmethod
+    def FanSpeedForNoiseLevel(noise_level):
+        return bisect.bisect_right(NOISE_LEVEL_THRESHOLDS, noise_level)
 
     def Encode(self, update_on_off_timers = True):
         if not self.valid:
             return None
 
-        cfg = self.Copy()
-        out = [0x00] * 40
-        out[0] = 0x7E
-        out[1] = 0x7E
-        out[2] = len(out) - 3
-        out[3] = 0x01
+        # Encode() must leave the config it was called on untouched. Rather than copying the whole
+        # config, copy just the fields that get overridden below into locals.
+        cfg = self
+        intake_exhaust = cfg.intake_exhaust
+        humidify_type = cfg.humidify_type
+        sleep_curve_type = cfg.sleep_curve_type
+        purify = cfg.purify
+        fan_speed = cfg.fan_speed
+        turbo = cfg.turbo
+        quiet_type = cfg.quiet_type
+
+        pack_u16 = UINT16_BE.pack_into
+        encode_temp = DeviceConfig.EncodeTempForUnits
+        is_celsius = cfg.temp_units == TempUnits.CELSIUS
+        curve = cfg.custom_sleep_curve
+
+        out = bytearray(CONFIG_FRAME_TEMPLATE)
 
         # Suspect that this is a bitmask of settings to update. Conjecture:
         # Bit 7 = ?
@@ -717,109 +892,106 @@ class DeviceConfig:
 
         # If not on, disable a handful of secondary things
         if not cfg.is_on:
-            cfg.intake_exhaust = ValveState.NONE
-            cfg.quiet_type = 0
-            cfg.sleep_curve_type = SleepCurveType.NONE
-            cfg.humidify_type = HumidifyType.NONE
-            cfg.purify = 0
+            intake_exhaust = ValveState.NONE
+            quiet_type = 0
+            sleep_curve_type = SleepCurveType.NONE
+            humidify_type = HumidifyType.NONE
+            purify = 0
 
         # If we have a top-level fan state (which unifies Quiet, Turbo, and fan speed), use that
-        # to set all the other fan parameters
+        # to set all the other fan parameters. See FAN_STATE_SETTINGS.
         if cfg.fan_state is not None:
-            cfg.turbo = False
-            cfg.quiet_type = 0
-            cfg.fan_speed = 0
-
-            if cfg.fan_state == FanState.TURBO:
-                cfg.turbo = True
-
-            # In the mobile app, "Quiet" sets quiet_type to 2 and "Auto quiet" sets it to 1.
-            # "Quiet" on the RF remote seems to set quiet_type to 2.
-            # Annoyingly, quiet_type is not the same as noise control. The latter seems to be
-            # just a naive mechanism for limiting the commanded fan speed, and doesn't affect the
-            # quiet_type setting?
-            if cfg.fan_state == FanState.AUTO_QUIET:
-                cfg.quiet_type = 1
-
-            # The app seems to prefer this
-            if cfg.fan_state == FanState.QUIET:
-                cfg.quiet_type = 2
-
-            # One of the vanilla states? Translate it directly
-            if cfg.fan_state in [FanState.AUTO, FanState.LEVEL_1, FanState.LEVEL_2, FanState.LEVEL_3, FanState.LEVEL_4, FanState.LEVEL_5]:
-                cfg.fan_speed = cfg.fan_state.value
+            turbo, quiet_type, fan_speed = FAN_STATE_SETTINGS.get(cfg.fan_state, (False, 0, 0))
 
         # Why even bother? Why does the unit even need to know the desired noise control levels,
         # if these are handled entirely by limiting the fan speed? Maybe this is what the other
         # quiet_type values are for?
         if cfg.noise_control_enable:
             if cfg.mode == DeviceMode.HEAT:
-                cfg.fan_speed = self.FanSpeedForNoiseLevel(self.noise_control_heating)
-                cfg.turbo = False
+                fan_speed = self.FanSpeedForNoiseLevel(self.noise_control_heating)
+                turbo = False
 
             if cfg.mode == DeviceMode.COOL:
-                cfg.fan_speed = self.FanSpeedForNoiseLevel(self.noise_control_cooling)
-                cfg.turbo = False
+                fan_speed = self.FanSpeedForNoiseLevel(self.noise_control_cooling)
+                turbo = False
+
+        mode = cfg.mode
 
         # Ugh. Guessing this is the "low-res" (?) version of fan speed, perhaps made for
         # backwards compatibility, back when they only supported three fan speeds.
         # We'll set the fan speed as-is (in all its 5-level glory) in a different byte later on.
-        out[5] = ((cfg.fan_speed + 1) >> 1) | (cfg.is_on << 7) | (cfg.mode.value << 4)
-        out[5] |= ((cfg.sleep_curve_type.value & 2) << 2) | (cfg.mode_mystery_bit_2 << 2)
-        out[6] = (cfg.EncodeTemp(cfg.temp) << 4) | (cfg.timer_on_off_enable << 3)
-
-        out[7] = (cfg.purify << 2) | (cfg.light << 1) | (cfg.turbo << 0)
+        out[5] = (
+            ((fan_speed + 1) >> 1) | (cfg.is_on << 7) | (mode << 4) |
+            ((sleep_curve_type & 2) << 2) | (cfg.mode_mystery_bit_2 << 2)
+        )
+        out[6] = (encode_temp(cfg.temp, is_celsius) << 4) | (cfg.timer_on_off_enable << 3)
 
         # Only enable X-Fan in cool/dehumidify modes
         # X-fan runs the blower for several minutes after cool/dehimidify is turned off, to dry
         # the coils and presumably prevent mold growth?
-        if cfg.mode == DeviceMode.COOL or cfg.mode == DeviceMode.DRY:
-            out[7] |= (cfg.x_fan << 3)
-
         # Not sure what the X-Fan-for-heat bit does. Maybe some other feature entirely?
         # I think this may be one of the ways "e-heater" is enabled
-        if cfg.mode == DeviceMode.HEAT:
-            out[7] |= (cfg.x_fan_for_heat << 3)
+        if mode == DeviceMode.COOL or mode == DeviceMode.DRY:
+            x_fan_bit = cfg.x_fan
+        elif mode == DeviceMode.HEAT:
+            x_fan_bit = cfg.x_fan_for_heat
+        else:
+            x_fan_bit = 0
+
+        out[7] = (x_fan_bit << 3) | (purify << 2) | (cfg.light << 1) | (turbo << 0)
 
-        out[8] = (cfg.EncodeTempFahrenheitFractionalBit(cfg.temp, cfg.temp_units) << 6)
-        out[8] |= ((cfg.temp_units == TempUnits.FAHRENHEIT) << 7)
-        out[8] |= (cfg.intake_exhaust.value << 4)
-        out[8] |= 0x02  # App hardcodes this; no idea what it does
-        out[9] = (cfg.vertical_air_direction.value << 4) | cfg.horizontal_air_direction.value
+        # Bit 1 is hardcoded by the app; no idea what it does
+        out[8] = (
+            ((cfg.temp_units == TempUnits.FAHRENHEIT) << 7) |
+            (cfg.EncodeTempFahrenheitFractionalBit(cfg.temp, cfg.temp_units) << 6) |
+            (intake_exhaust << 4) | 0x02
+        )
+        out[9] = (cfg.vertical_air_direction << 4) | cfg.horizontal_air_direction
 
         # Determined experimentally
-        out[10] = (cfg.temp_display.value << 4) | (cfg.use_remote_temp_sensor << 6)
+        out[10] = (cfg.temp_display << 4) | (cfg.use_remote_temp_sensor << 6)
 
-        out[11] = (cfg.EncodeTempCelciusFractionalBit(cfg.temp, cfg.temp_units) << 3) | (cfg.humidify_type.value << 4)
+        out[11] = (cfg.EncodeTempCelciusFractionalBit(cfg.temp, cfg.temp_units) << 3) | (humidify_type << 4)
 
-        if cfg.mode == DeviceMode.HEAT:
+        if mode == DeviceMode.HEAT:
             out[12] = cfg.heat_assist << 7
 
-        out[13] = cfg.minutes_until_on & 0xff
-        out[14] = ((cfg.minutes_until_on & 0x700) >> 4) | (cfg.minutes_until_off & 0x0f) | (cfg.timer_remote_flag << 7)
-        out[15] = (cfg.minutes_until_off & 0x7f0) >> 4
+        # The two 11-bit countdown timers share bytes 13-15, read as a little-endian 24-bit word:
+        #   bits 0-7   : minutes until on, bits 0-7
+        #   bits 8-11  : minutes until off, bits 0-3
+        #   bits 12-14 : minutes until on, bits 8-10
+        #   bit 15     : remote timer flag
+        #   bits 16-22 : minutes until off, bits 4-10
+        timers = (cfg.minutes_until_on & 0xff) | ((cfg.minutes_until_on & 0x700) << 4)
+        timers |= ((cfg.minutes_until_off & 0x0f) << 8) | ((cfg.minutes_until_off & 0x7f0) << 12)
+        timers |= cfg.timer_remote_flag << 15
+        out[13:16] = timers.to_bytes(3, 'little')
 
         out[16] = (cfg.timer_on_enable << 5) | (cfg.timer_off_enable << 4)
 
-        out[17] = cfg.quiet_type << 2
-    
         # The sleep curve type is encoded in a silly way
-        if cfg.sleep_curve_type == SleepCurveType.SIESTA:
-            out[17] |= cfg.sleep_curve_type.value
+        if sleep_curve_type == SleepCurveType.SIESTA:
+            sleep_curve_bits = sleep_curve_type
         else:
-            out[17] |= (cfg.sleep_curve_type.value & 1) << 4
+            sleep_curve_bits = (sleep_curve_type & 1) << 4
+
+        out[17] = (quiet_type << 2) | sleep_curve_bits
 
-        out[18] = (cfg.EncodeTemp(cfg.custom_sleep_curve[0]) << 4) | cfg.EncodeTemp(cfg.custom_sleep_curve[1])
-        out[19] = cfg.fan_speed
+        # The custom sleep curve is packed two points per byte, high nibble first. The first pair
+        # goes in byte 18 and the other three in bytes 21-23.
+        packed_curve = [
+            (encode_temp(hi, is_celsius) << 4) | encode_temp(lo, is_celsius)
+            for hi, lo in zip(curve[0::2], curve[1::2])
+        ]
+        out[18] = packed_curve[0]
+        out[19] = fan_speed
 
         # Putting some non-zero values here causes "EY" to be displayed on the unit
         # This means "outdoor ambient temperature reading out of range". Does this let us override
         # the outdoor temperature reading??
         out[20] = 0
 
-        out[21] = (cfg.EncodeTemp(cfg.custom_sleep_curve[2]) << 4) | cfg.EncodeTemp(cfg.custom_sleep_curve[3])
-        out[22] = (cfg.EncodeTemp(cfg.custom_sleep_curve[4]) << 4) | cfg.EncodeTemp(cfg.custom_sleep_curve[5])
-        out[23] = (cfg.EncodeTemp(cfg.custom_sleep_curve[6]) << 4) | cfg.EncodeTemp(cfg.custom_sleep_curve[7])
+        out[21], out[22], out[23] = packed_curve[1:]
 
         # Bytes 24 and 25 are fixed at 0?
         # It looks like byte 25 might provide a way to specify the value of the remote temp
@@ -829,30 +1001,23 @@ class DeviceConfig:
         # off.
         out[25] = cfg.remote_temp_val  # Remote temp sensor, in C??
 
-        out[26] = cfg.clock >> 8
-        out[27] = cfg.clock & 0xff
-
-        out[28] = cfg.sleep_curve_clock >> 8
-        out[29] = cfg.sleep_curve_clock & 0xff
-
-        out[30] = (cfg.timer_on_use_clock << 6) | (cfg.timer_off_use_clock << 4) | (cfg.off_time >> 8)
-        out[31] = cfg.off_time & 0xff
-
-        out[32] = (cfg.day_of_week << 5) | (cfg.on_time >> 8)
-        out[33] = cfg.on_time & 0xff
+        # Clocks and on/off times: big-endian 16-bit words, some with flags in their top bits
+        pack_u16(out, 26, cfg.clock)
+        pack_u16(out, 28, cfg.sleep_curve_clock)
+        pack_u16(out, 30, (cfg.timer_on_use_clock << 14) | (cfg.timer_off_use_clock << 12) | cfg.off_time)
+        pack_u16(out, 32, (cfg.day_of_week << 13) | cfg.on_time)
 
         out[34] = cfg.day_of_week_on_mask
         out[35] = cfg.day_of_week_off_mask
 
-        out[36] = (cfg.regional_swing_avoid_people << 1)
-
-        # A position of 256 seems to spill over into a different byte
-        if cfg.regional_swing_position == 256:
-            out[36] |= 0x01
-        else:
-            out[37] = cfg.regional_swing_position
+        # A position of 256 seems to spill over into a different byte. Anything else goes into
+        # byte 37 as-is; an out-of-range position fails the bytearray store rather than being
+        # masked into a different setting.
+        swing_overflow = cfg.regional_swing_position == 256
+        out[36] = (cfg.regional_swing_avoid_people << 1) | swing_overflow
+        out[37] = 0 if swing_overflow else cfg.regional_swing_position
 
-        self.SetChecksum(out)
+        out[-1] = Checksum(out)
 
         return out
 
@@ -861,44 +1026,60 @@ class DeviceConfig:
         if not self.valid:
             return None
 
-        cfg = self.Copy()
-        out = [0x00] * 40
-        out[0] = 0x7E
-        out[1] = 0x7E
-        out[2] = len(out) - 3
-        out[3] = 0x01
+        # Everything but the update mask and the remote temp reading is left at zero, so there is
+        # no need to take a copy of the config here like Encode() does.
+        out = bytearray(CONFIG_FRAME_TEMPLATE)
 
         # If we are telling the unit to send a new "I FEEL" temperature, set the bit that causes the unit to latch the
         # new "I FEEL" value. This needs to be done *in addition to* the bit that actually enables the "I FEEL" feature.
         if self.use_remote_temp_sensor:
-            out[4] |= 0x40  # Also update the remote temp reading?
+            out[4] = 0x40  # Also update the remote temp reading?
 
-        out[25] = cfg.remote_temp_val  # Remote temp sensor, in C??
+        out[25] = self.remote_temp_val  # Remote temp sensor, in C??
 
-        self.SetChecksum(out)
+        out[-1] = Checksum(out)
         return out
 
-
-    def SetChecksum(self, buf):
-        sum = 0
-        for i in range(2, len(buf) - 1):
-            sum += buf[i]
-        buf[len(buf) - 1] = sum & 0xff
-
 sock = DeviceSocket()
-sock.Open()
+if not sock.Open():
+    sys.exit(1)
 
 cfg = DeviceConfig()
 
 sent = False
 
-while True:
-    time.sleep(1)
-    sock.SendQuery()
+# Encoded config waiting to go out with the next query
+pending_config = None
 
-    while sock.Available(0.1):
-        buf = sock.Read()
-        DumpBuffer("receive", buf)
+next_query = time.monotonic()
+
+while True:
+    # Send any pending config in the same call as the query
+    sock.SendRaw(pending_config, DeviceSocket.QueryFrame())
+    pending_config = None
+
+    # Schedule each query off the previous deadline rather than off the current time, so time
+    # spent handling frames doesn't stretch the polling period. If we somehow fell a whole period
+    # behind, start over from now instead of firing off a burst of queries.
+    next_query += 1
+    if next_query <= time.monotonic():
+        next_query = time.monotonic() + 1
+
+    # Rather than sleeping and then polling, wait on the socket until the next query is due, and
+    # handle each frame as soon as it arrives
+    while True:
+        remaining = next_query - time.monotonic()
+        if remaining <= 0 or not sock.Available(remaining):
+            break
+
+        try:
+            buf = sock.Read()
+        except ConnectionError as e:
+            print(f"Lost connection to device: {e}")
+            sys.exit(1)
+
+        if DUMP_FRAMES:
+            DumpBuffer("receive", buf)
 
         if buf is None:
             print("Invalid frame received?")
@@ -907,14 +1088,16 @@ while True:
         if buf[3] == 0x31 or buf[3] == 0x32:  # Query response?
             cfg.Decode(buf)
             cfg.Print()
+
+            # The config only changes when a new status comes in, so only re-encode it for the
+            # dump then
+            if DUMP_FRAMES:
+                DumpBuffer("config", cfg.Encode())
         else:
             print(f"Unknown frame received: 0x{buf[3]:02x}")
             DumpBuffer("unknown frame", buf)
             continue
 
-    cmd = cfg.Encode()
-    DumpBuffer("config", cmd)
-
     # Hack, for initial testing. After receiving the first status message, send a test config.
     if cfg.valid and not sent:
         cfg.fan_state = FanState.LEVEL_5
@@ -934,6 +1117,6 @@ while True:
         cfg.timer_on_enable = False
         cfg.minutes_until_on = 0
         cfg.minutes_until_off = 10
-        sock.SendConfig(cfg)
+        pending_config = cfg.Encode()
 
         sent = True